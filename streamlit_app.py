@@ -7,8 +7,13 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from google.oauth2 import service_account
 from google.cloud import bigquery
-from datetime import datetime, timedelta
+from google.cloud import bigquery_storage
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import io
 
 # Page configuration
 st.set_page_config(
@@ -40,55 +45,187 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+AGGREGATION_VIEW = "`upheld-setting-420306.aviation_grievances_data.aviation_grievances_daily_aggregation`"
+
+# Per-row grievance counts returned by get_grievance_data
+COUNT_COLS = (
+    'Total_Received',
+    'Active_Grievances_Without_Escalation',
+    'Active_Grievances_With_Escalation',
+    'Closed_Grievances_Without_Escalation',
+    'Closed_Grievances_With_Escalation',
+    'Grievances_Without_Ratings',
+    'Grievances_With_Ratings',
+    'Grievances_With_Very_Good_Rating',
+    'Grievances_With_Good_Rating',
+    'Grievances_With_OK_Rating',
+    'Grievances_With_Bad_Rating',
+    'Grievances_With_Very_Bad_Rating',
+    'Twitter_Grievances',
+    'Facebook_Grievances',
+    'Grievances_Additional_Info_Provided',
+    'Grievances_Additional_Info_Not_Provided',
+    'Grievances_Without_Feedback',
+    'Grievances_With_Feedback',
+    'Grievances_With_Feedback_Issue_Not_Resolved',
+    'Grievances_With_Feedback_Issue_Resolved',
+)
+
+# Rating buckets from best to worst
+RATING_COLS = (
+    'Grievances_With_Very_Good_Rating',
+    'Grievances_With_Good_Rating',
+    'Grievances_With_OK_Rating',
+    'Grievances_With_Bad_Rating',
+    'Grievances_With_Very_Bad_Rating',
+)
+
+# Derived per-row metrics returned by get_grievance_data
+DERIVED_COUNT_COLS = ('Total_Active', 'Total_Closed', 'Total_Escalated', 'Total_Social_Media')
+RATE_COLS = (
+    'Resolution_Rate_Percent',
+    'Escalation_Rate_Percent',
+    'Social_Media_Rate_Percent',
+    'Feedback_Response_Rate_Percent',
+    'Satisfaction_Score',
+)
+
+# Column types for get_grievance_data. Daily per-airline counts fit
+# comfortably in 32 bits, and float32 is plenty for percentages and scores
+GRIEVANCE_DTYPES = {
+    **{col: 'Int32' for col in COUNT_COLS + DERIVED_COUNT_COLS},
+    **{col: 'float32' for col in RATE_COLS},
+    'Airline': 'category',
+    'Type': 'category',
+}
+
 # Initialize BigQuery client
-@st.cache_resource
-def init_bigquery_client():
-    credentials = service_account.Credentials.from_service_account_info(
+def get_credentials():
+    return service_account.Credentials.from_service_account_info(
         st.secrets["gcp_service_account"]
     )
-    return bigquery.Client(credentials=credentials)
+
+@st.cache_resource
+def init_bigquery_client():
+    return bigquery.Client(credentials=get_credentials())
+
+# Initialize BigQuery Storage client once instead of once per query
+@st.cache_resource
+def init_bqstorage_client():
+    return bigquery_storage.BigQueryReadClient(credentials=get_credentials())
 
 client = init_bigquery_client()
+bqstorage_client = init_bqstorage_client()
 
-# Cache data queries with TTL
-@st.cache_data(ttl=600)
-def run_query(query):
-    """Execute BigQuery with caching"""
-    try:
-        query_job = client.query(query)
-        rows_raw = query_job.result()
-        rows = [dict(row) for row in rows_raw]
-        return rows
-    except Exception as e:
-        st.error(f"Query failed: {str(e)}")
-        return []
-
-# Get available date range from materialized view
+def to_query_parameter(name, value):
+    """Convert a plain Python value into a BigQuery query parameter"""
+    if isinstance(value, (list, tuple)):
+        return bigquery.ArrayQueryParameter(name, "STRING", list(value))
+    if isinstance(value, date):
+        return bigquery.ScalarQueryParameter(name, "DATE", value)
+    return bigquery.ScalarQueryParameter(name, "STRING", value)
+
+def build_job_config(params=None):
+    """Build a QueryJobConfig from a dict of query parameter values"""
+    return bigquery.QueryJobConfig(
+        use_query_cache=True,
+        query_parameters=[to_query_parameter(name, value) for name, value in (params or {}).items()]
+    )
+
+# Query helpers are not cached themselves; caching happens once, on the
+# finished results (get_metadata, build_dashboard_payload, build_csv)
+def run_query(query, params=None):
+    """Execute BigQuery and return the rows as dicts"""
+    # Filter values are passed as query parameters rather than interpolated,
+    # so the SQL text stays stable and BigQuery's result cache can be reused.
+    # Only meant for small lookups (a handful of rows); anything row-level
+    # goes through run_query_df instead of a dict per row. Errors are raised
+    # rather than returned so a failed query is never cached as a result
+    query_job = client.query(query, job_config=build_job_config(params))
+    return [dict(row) for row in query_job.result()]
+
+def run_query_df(query, params=None, dtypes=None):
+    """Execute BigQuery and return the result as a DataFrame"""
+    # The BigQuery Storage API streams Arrow record batches straight into
+    # pandas instead of building a Python dict per row; `dtypes` sets column
+    # types while the frame is built rather than casting afterwards. Like
+    # run_query, errors propagate instead of caching an empty frame
+    query_job = client.query(query, job_config=build_job_config(params))
+    return query_job.result().to_dataframe(bqstorage_client=bqstorage_client, dtypes=dtypes)
+
+# Get available date range and airlines from materialized view in one round-trip
 @st.cache_data(ttl=3600)
-def get_date_range():
-    """Get min and max dates from the materialized view"""
-    query = """
+def get_metadata():
+    """Get min and max dates and the unique airline companies for filtering"""
+    query = f"""
     SELECT 
         MIN(Date_Inserted) as min_date,
-        MAX(Date_Inserted) as max_date
-    FROM `upheld-setting-420306.aviation_grievances_data.aviation_grievances_daily_aggregation`
+        MAX(Date_Inserted) as max_date,
+        ARRAY_AGG(DISTINCT Airline IGNORE NULLS ORDER BY Airline) as airlines
+    FROM {AGGREGATION_VIEW}
     """
     result = run_query(query)
     if result:
-        return result[0]['min_date'], result[0]['max_date']
-    return None, None
+        return result[0]['min_date'], result[0]['max_date'], result[0]['airlines'] or []
+    return None, None, []
+
+# WHERE clause shared by all filtered queries; an empty airline list means
+# no airline filter
+FILTER_CLAUSE = """
+    WHERE Date_Inserted >= @start_date
+    AND Date_Inserted <= @end_date
+    AND (ARRAY_LENGTH(@airlines) = 0 OR Airline IN UNNEST(@airlines))
+    """
+
+def build_filter_params(start_date, end_date, airlines=None):
+    """Build the query parameters for FILTER_CLAUSE"""
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "airlines": list(airlines or []),
+    }
+
+# Per-row derived metrics, computed in BigQuery so the dashboard doesn't
+# redo the arithmetic in pandas on every load. Rates are 0 when nothing was
+# received (or rated) on that row
+ROW_METRICS_CTE = f"""
+    WITH row_metrics AS (
+        SELECT
+            *,
+            Active_Grievances_Without_Escalation + Active_Grievances_With_Escalation AS Total_Active,
+            Closed_Grievances_Without_Escalation + Closed_Grievances_With_Escalation AS Total_Closed,
+            Active_Grievances_With_Escalation + Closed_Grievances_With_Escalation AS Total_Escalated,
+            Twitter_Grievances + Facebook_Grievances AS Total_Social_Media,
+            IF(Total_Received > 0,
+               (Closed_Grievances_Without_Escalation + Closed_Grievances_With_Escalation) / Total_Received * 100,
+               0) AS Resolution_Rate_Percent,
+            IF(Total_Received > 0,
+               (Active_Grievances_With_Escalation + Closed_Grievances_With_Escalation) / Total_Received * 100,
+               0) AS Escalation_Rate_Percent,
+            IF(Total_Received > 0,
+               (Twitter_Grievances + Facebook_Grievances) / Total_Received * 100,
+               0) AS Social_Media_Rate_Percent,
+            IF(Total_Received > 0,
+               Grievances_With_Feedback / Total_Received * 100,
+               0) AS Feedback_Response_Rate_Percent,
+            IF(Grievances_With_Very_Good_Rating + Grievances_With_Good_Rating + Grievances_With_OK_Rating
+                   + Grievances_With_Bad_Rating + Grievances_With_Very_Bad_Rating > 0,
+               (Grievances_With_Very_Good_Rating * 5 + Grievances_With_Good_Rating * 4
+                   + Grievances_With_OK_Rating * 3 + Grievances_With_Bad_Rating * 2
+                   + Grievances_With_Very_Bad_Rating * 1)
+               / (Grievances_With_Very_Good_Rating + Grievances_With_Good_Rating + Grievances_With_OK_Rating
+                   + Grievances_With_Bad_Rating + Grievances_With_Very_Bad_Rating),
+               0) AS Satisfaction_Score
+        FROM {AGGREGATION_VIEW}
+        {FILTER_CLAUSE}
+    )
+    """
 
 # Main data query function using materialized view
 def get_grievance_data(start_date, end_date, airlines=None):
     """Fetch grievance data from materialized view with filtering"""
-    
-    # Add airline filter if specified
-    airline_filter = ""
-    if airlines and len(airlines) > 0:
-        airline_list = "', '".join(airlines)
-        airline_filter = f"AND Airline IN ('{airline_list}')"
-    
     query = f"""
+    {ROW_METRICS_CTE}
     SELECT 
         Date_Inserted,
         Airline,
@@ -112,92 +249,464 @@ def get_grievance_data(start_date, end_date, airlines=None):
         Grievances_Without_Feedback,
         Grievances_With_Feedback,
         Grievances_With_Feedback_Issue_Not_Resolved,
-        Grievances_With_Feedback_Issue_Resolved    
-    FROM `upheld-setting-420306.aviation_grievances_data.aviation_grievances_daily_aggregation`
-    WHERE Date_Inserted >= '{start_date}'
-    AND Date_Inserted <= '{end_date}'
-    {airline_filter}
+        Grievances_With_Feedback_Issue_Resolved,
+        Total_Active,
+        Total_Closed,
+        Total_Escalated,
+        Total_Social_Media,
+        Resolution_Rate_Percent,
+        Escalation_Rate_Percent,
+        Social_Media_Rate_Percent,
+        Feedback_Response_Rate_Percent,
+        Satisfaction_Score
+    FROM row_metrics
     ORDER BY Date_Inserted DESC
     """
-    return run_query(query)
+    return run_query_df(query, build_filter_params(start_date, end_date, airlines), GRIEVANCE_DTYPES)
 
-# Get unique airline companies from materialized view
-@st.cache_data(ttl=3600)
-def get_airline_companies():
-    """Get unique airline companies for filtering"""
-    query = """
-    SELECT DISTINCT Airline
-    FROM `upheld-setting-420306.aviation_grievances_data.aviation_grievances_daily_aggregation`
+# Chart aggregations are computed in BigQuery so only the rolled-up rows
+# are transferred instead of every daily row in the range
+def get_daily_stats(start_date, end_date, airlines=None):
+    """Get daily received/active/closed totals for the time series"""
+    query = f"""
+    SELECT
+        Date_Inserted,
+        SUM(Total_Received) AS Total_Received,
+        SUM(Active_Grievances_Without_Escalation + Active_Grievances_With_Escalation) AS Total_Active,
+        SUM(Closed_Grievances_Without_Escalation + Closed_Grievances_With_Escalation) AS Total_Closed
+    FROM {AGGREGATION_VIEW}
+    {FILTER_CLAUSE}
+    GROUP BY Date_Inserted
+    ORDER BY Date_Inserted
+    """
+    return run_query_df(query, build_filter_params(start_date, end_date, airlines))
+
+def get_airline_type_totals(start_date, end_date, airlines=None):
+    """Get total grievances received per airline and type"""
+    query = f"""
+    SELECT
+        Airline,
+        Type,
+        SUM(Total_Received) AS Total_Received
+    FROM {AGGREGATION_VIEW}
+    {FILTER_CLAUSE}
+    AND Airline IS NOT NULL
+    AND Type IS NOT NULL
+    GROUP BY Airline, Type
+    ORDER BY Total_Received DESC
+    """
+    return run_query_df(query, build_filter_params(start_date, end_date, airlines))
+
+def get_airline_kpis(start_date, end_date, airlines=None):
+    """Get per-airline totals and average KPIs"""
+    query = f"""
+    {ROW_METRICS_CTE}
+    SELECT
+        Airline,
+        SUM(Total_Received) AS Total_Received,
+        AVG(Total_Received) AS Daily_Avg_Received,
+        SUM(Total_Closed) AS Total_Closed,
+        AVG(Resolution_Rate_Percent) AS Resolution_Rate_Percent,
+        AVG(Escalation_Rate_Percent) AS Escalation_Rate_Percent,
+        AVG(Satisfaction_Score) AS Satisfaction_Score,
+        AVG(Feedback_Response_Rate_Percent) AS Feedback_Response_Rate_Percent
+    FROM row_metrics
     WHERE Airline IS NOT NULL
+    GROUP BY Airline
     ORDER BY Airline
     """
-    result = run_query(query)
-    return [row['Airline'] for row in result]
+    return run_query_df(query, build_filter_params(start_date, end_date, airlines))
 
-# Get unique types from materialized view
-@st.cache_data(ttl=3600)
-def get_grievance_types():
-    """Get unique grievance types for filtering"""
-    query = """
-    SELECT DISTINCT Type
-    FROM `upheld-setting-420306.aviation_grievances_data.aviation_grievances_daily_aggregation`
+def get_type_kpis(start_date, end_date, airlines=None):
+    """Get per-type totals and average KPIs"""
+    query = f"""
+    {ROW_METRICS_CTE}
+    SELECT
+        Type,
+        SUM(Total_Received) AS Total_Received,
+        AVG(Resolution_Rate_Percent) AS Resolution_Rate_Percent,
+        AVG(Escalation_Rate_Percent) AS Escalation_Rate_Percent,
+        AVG(Satisfaction_Score) AS Satisfaction_Score
+    FROM row_metrics
     WHERE Type IS NOT NULL
-    ORDER BY Type
+    GROUP BY Type
+    ORDER BY Total_Received DESC
     """
-    result = run_query(query)
-    return [row['Type'] for row in result]
-
-def calculate_metrics(df):
-    """Calculate derived metrics from the available columns"""
-    # Calculate additional derived metrics
-    df['Total_Active'] = df['Active_Grievances_Without_Escalation'] + df['Active_Grievances_With_Escalation']
-    df['Total_Closed'] = df['Closed_Grievances_Without_Escalation'] + df['Closed_Grievances_With_Escalation']
-    df['Total_Escalated'] = df['Active_Grievances_With_Escalation'] + df['Closed_Grievances_With_Escalation']
-    df['Total_Social_Media'] = df['Twitter_Grievances'] + df['Facebook_Grievances']
+    return run_query_df(query, build_filter_params(start_date, end_date, airlines))
+
+def get_column_totals(start_date, end_date, airlines=None):
+    """Get rating, social media and feedback totals in a single reduction"""
+    query = f"""
+    SELECT
+        SUM(Grievances_With_Very_Good_Rating) AS Grievances_With_Very_Good_Rating,
+        SUM(Grievances_With_Good_Rating) AS Grievances_With_Good_Rating,
+        SUM(Grievances_With_OK_Rating) AS Grievances_With_OK_Rating,
+        SUM(Grievances_With_Bad_Rating) AS Grievances_With_Bad_Rating,
+        SUM(Grievances_With_Very_Bad_Rating) AS Grievances_With_Very_Bad_Rating,
+        SUM(Twitter_Grievances) AS Twitter_Grievances,
+        SUM(Facebook_Grievances) AS Facebook_Grievances,
+        SUM(Grievances_With_Feedback_Issue_Resolved) AS Grievances_With_Feedback_Issue_Resolved,
+        SUM(Grievances_With_Feedback_Issue_Not_Resolved) AS Grievances_With_Feedback_Issue_Not_Resolved
+    FROM {AGGREGATION_VIEW}
+    {FILTER_CLAUSE}
+    """
+    result = run_query(query, build_filter_params(start_date, end_date, airlines))
+    # SUM over no rows is NULL, so report missing totals as 0
+    return {name: total or 0 for name, total in result[0].items()} if result else {}
+
+def load_grievance_df(start_date, end_date, airlines_tuple):
+    """Fetch grievance data, including the derived metrics"""
+    df = get_grievance_data(start_date, end_date, airlines_tuple)
+    if df.empty:
+        return df
     
-    # Calculate rates (handle division by zero)
-    df['Resolution_Rate_Percent'] = np.where(
-        df['Total_Received'] > 0,
-        (df['Total_Closed'] / df['Total_Received']) * 100,
-        0
-    )
+    df['Date_Inserted'] = pd.to_datetime(df['Date_Inserted'])
+    return df
+
+# How long fetched dashboard data is served from the cache before BigQuery
+# is queried again
+DATA_TTL = timedelta(minutes=10)
+
+# Everything the page renders for a filter set, fetched and shaped once, so
+# widget interactions only re-render instead of re-querying and regrouping.
+# `fetched_at` is taken after the queries finish, so the cache entry expires
+# no earlier than fetched_at + DATA_TTL
+@st.cache_data(ttl=DATA_TTL, show_spinner=False)
+def build_dashboard_payload(start_date, end_date, airlines_tuple):
+    """Fetch the grievance data and precompute the per-chart frames"""
+    queries = {
+        'df': load_grievance_df,
+        'airline_kpis': get_airline_kpis,
+        'type_kpis': get_type_kpis,
+        'column_totals': get_column_totals,
+        'daily_stats': get_daily_stats,
+        'airline_type_stats': get_airline_type_totals,
+    }
+    # The queries don't depend on each other, so all the jobs are started up
+    # front and collected together: a cold load waits about one round trip
+    # instead of six in a row
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        futures = {
+            name: executor.submit(fetch, start_date, end_date, airlines_tuple)
+            for name, fetch in queries.items()
+        }
+    results = {name: future.result() for name, future in futures.items()}
     
-    df['Escalation_Rate_Percent'] = np.where(
-        df['Total_Received'] > 0,
-        (df['Total_Escalated'] / df['Total_Received']) * 100,
-        0
-    )
+    df = results['df']
+    if df.empty:
+        return {'df': df, 'fetched_at': datetime.now()}
     
-    df['Social_Media_Rate_Percent'] = np.where(
-        df['Total_Received'] > 0,
-        (df['Total_Social_Media'] / df['Total_Received']) * 100,
-        0
-    )
+    airline_agg = results['airline_kpis'].set_index('Airline')
+    type_agg = results['type_kpis'].set_index('Type')
+    column_totals = results['column_totals']
+    
+    airline_summary = airline_agg[[
+        'Total_Received',
+        'Daily_Avg_Received',
+        'Resolution_Rate_Percent',
+        'Escalation_Rate_Percent',
+        'Satisfaction_Score'
+    ]].round(2)
+    airline_summary.columns = ['Total', 'Daily Avg', 'Avg Resolution %', 'Avg Escalation %', 'Avg Satisfaction']
+    
+    return {
+        'df': df,
+        'airline_agg': airline_agg,
+        'type_agg': type_agg,
+        'column_totals': column_totals,
+        'daily_stats': results['daily_stats'],
+        'airline_type_stats': results['airline_type_stats'],
+        'airline_stats': airline_agg[['Total_Received']].sort_values('Total_Received', ascending=False).reset_index(),
+        'rating_sums': np.array([column_totals.get(col, 0) for col in RATING_COLS], dtype=np.int64),
+        'kpi_data': airline_agg[[
+            'Resolution_Rate_Percent',
+            'Escalation_Rate_Percent',
+            'Satisfaction_Score',
+            'Feedback_Response_Rate_Percent'
+        ]],
+        'resolution_data': airline_agg[['Total_Received', 'Total_Closed', 'Resolution_Rate_Percent']].reset_index(),
+        'type_stats': type_agg[['Total_Received']].reset_index(),
+        'type_kpi': type_agg.reset_index(),
+        'airline_summary': airline_summary,
+        'fetched_at': datetime.now(),
+    }
+
+# Serialize the export once per filter set instead of on every rerun
+@st.cache_data(ttl=DATA_TTL)
+def build_csv(start_date, end_date, airlines_tuple):
+    """Build the CSV export of the grievance data as bytes"""
+    df = build_dashboard_payload(start_date, end_date, airlines_tuple)['df']
+    table = pa.Table.from_pandas(df, preserve_index=False)
     
-    df['Feedback_Response_Rate_Percent'] = np.where(
-        df['Total_Received'] > 0,
-        (df['Grievances_With_Feedback'] / df['Total_Received']) * 100,
-        0
+    # Write plain dates rather than midnight timestamps, as pandas did
+    date_index = table.schema.get_field_index('Date_Inserted')
+    table = table.set_column(date_index, 'Date_Inserted', table['Date_Inserted'].cast(pa.date32()))
+    
+    sink = io.BytesIO()
+    pa_csv.write_csv(table, sink)
+    return sink.getvalue()
+
+# Upper bound on points per time-series trace sent to the browser
+MAX_TIME_POINTS = 1500
+
+def minmax_indices(columns, n_out=MAX_TIME_POINTS):
+    """Pick about n_out row positions, keeping each bucket's min and max of every column"""
+    n_rows = len(columns[0])
+    if n_rows <= n_out:
+        return np.arange(n_rows)
+    
+    # Keeping both extremes of every bucket preserves the spikes that plain
+    # striding would drop. Each bucket keeps up to two rows per column, so the
+    # bucket count is sized to keep the union within n_out
+    n_buckets = max(1, n_out // (2 * len(columns)))
+    edges = np.linspace(0, n_rows, n_buckets + 1).astype(np.int64)
+    keep = set()
+    for column in columns:
+        values = pd.Series(column).to_numpy(dtype=np.float64, na_value=np.nan)
+        for start, stop in zip(edges[:-1], edges[1:]):
+            bucket = values[start:stop]
+            keep.add(start + int(np.argmin(bucket)))
+            keep.add(start + int(np.argmax(bucket)))
+    return np.fromiter(sorted(keep), dtype=np.int64)
+
+# Largest bubble diameter in pixels, matching px.scatter's default size_max
+BUBBLE_SIZE_MAX = 20
+
+def build_bubble_fig(names, x, y, sizes):
+    """Build a bubble chart with one trace (and legend entry) per name"""
+    # Scale bubble areas the way px.scatter does, so the largest value gets
+    # a BUBBLE_SIZE_MAX-pixel bubble
+    sizeref = 2.0 * sizes.max() / BUBBLE_SIZE_MAX ** 2 if len(sizes) and sizes.max() > 0 else 1
+    
+    fig = go.Figure()
+    for name, x_value, y_value, size in zip(names, x, y, sizes):
+        fig.add_trace(go.Scatter(
+            x=[x_value],
+            y=[y_value],
+            mode='markers',
+            name=name,
+            marker=dict(size=[size], sizemode='area', sizeref=sizeref)
+        ))
+    return fig
+
+# Figures are cached as resources on their (small, aggregated) input data:
+# st.cache_data would pickle them, and unpickling a Plotly figure rebuilds and
+# revalidates it, whereas a resource hit hands back the same object.
+# st.plotly_chart only reads the figure, so sharing it is safe. They expire
+# with the data they were built from (DATA_TTL)
+@st.cache_resource(ttl=DATA_TTL)
+def build_time_fig(daily_stats):
+    """Build the grievances-over-time line chart"""
+    # Wide date ranges are thinned server-side so the browser gets a bounded
+    # number of points. All traces share the same rows, so the unified hover
+    # still shows every series at each date
+    shown = daily_stats.iloc[minmax_indices([
+        daily_stats['Total_Received'],
+        daily_stats['Total_Active'],
+        daily_stats['Total_Closed']
+    ])]
+    
+    fig_time = go.Figure()
+    fig_time.add_trace(go.Scatter(
+        x=shown['Date_Inserted'],
+        y=shown['Total_Received'],
+        name='Total Received',
+        line=dict(color='#1f77b4', width=3)
+    ))
+    fig_time.add_trace(go.Scatter(
+        x=shown['Date_Inserted'],
+        y=shown['Total_Active'],
+        name='Active',
+        line=dict(color='#ff7f0e', width=2)
+    ))
+    fig_time.add_trace(go.Scatter(
+        x=shown['Date_Inserted'],
+        y=shown['Total_Closed'],
+        name='Closed',
+        line=dict(color='#2ca02c', width=2)
+    ))
+    
+    fig_time.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Number of Grievances",
+        hovermode='x unified',
+        height=400
     )
+    return fig_time
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_airline_type_fig(airline_type_stats):
+    """Build the grievances by airline and type bar chart"""
+    airlines = airline_type_stats['Airline'].to_numpy()
+    types = airline_type_stats['Type'].to_numpy()
+    totals = airline_type_stats['Total_Received'].to_numpy()
     
-    # Calculate satisfaction score (weighted average of ratings)
-    total_rated = (df['Grievances_With_Very_Good_Rating'] + 
-                   df['Grievances_With_Good_Rating'] + 
-                   df['Grievances_With_OK_Rating'] + 
-                   df['Grievances_With_Bad_Rating'] + 
-                   df['Grievances_With_Very_Bad_Rating'])
+    # One stacked trace per type, in order of first appearance
+    fig_airline_type = go.Figure()
+    for type_name in pd.unique(types):
+        in_type = types == type_name
+        fig_airline_type.add_trace(go.Bar(
+            x=airlines[in_type],
+            y=totals[in_type],
+            name=type_name
+        ))
+    fig_airline_type.update_xaxes(tickangle=45)
+    fig_airline_type.update_layout(
+        title="Total Grievances by Airline and Type",
+        xaxis_title="Airline",
+        yaxis_title="Total Grievances",
+        legend_title_text="Type",
+        barmode='relative',
+        height=400
+    )
+    return fig_airline_type
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_airline_fig(airline_stats):
+    """Build the grievances by airline pie chart"""
+    fig_airline = px.pie(
+        airline_stats,
+        values='Total_Received',
+        names='Airline',
+        title="Total Grievances by Airline"
+    )
+    fig_airline.update_layout(height=400)
+    return fig_airline
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_ratings_fig(rating_sums):
+    """Build the rating distribution bar chart"""
+    rating_labels = ['Very Good', 'Good', 'OK', 'Bad', 'Very Bad']
     
-    df['Satisfaction_Score'] = np.where(
-        total_rated > 0,
-        (df['Grievances_With_Very_Good_Rating'] * 5 + 
-         df['Grievances_With_Good_Rating'] * 4 + 
-         df['Grievances_With_OK_Rating'] * 3 + 
-         df['Grievances_With_Bad_Rating'] * 2 + 
-         df['Grievances_With_Very_Bad_Rating'] * 1) / total_rated,
-        0
+    fig_ratings = go.Figure(data=[
+        go.Bar(
+            x=rating_labels,
+            y=rating_sums,
+            marker_color=['#2ca02c', '#7fcc7f', '#ffff99', '#ff7f0e', '#d62728']
+        )
+    ])
+    fig_ratings.update_layout(
+        title="Grievance Ratings",
+        xaxis_title="Rating",
+        yaxis_title="Number of Grievances",
+        height=400
     )
+    return fig_ratings
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_social_fig(twitter_grievances, facebook_grievances):
+    """Build the social media platform bar chart"""
+    social_data = {
+        'Platform': ['Twitter', 'Facebook'],
+        'Grievances': [twitter_grievances, facebook_grievances]
+    }
+    social_df = pd.DataFrame(social_data)
     
-    return df
+    fig_social = px.bar(
+        social_df,
+        x='Platform',
+        y='Grievances',
+        color='Platform',
+        title="Social Media Platform Distribution"
+    )
+    fig_social.update_layout(height=400)
+    return fig_social
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_heatmap_fig(kpi_data):
+    """Build the KPI heatmap by airline"""
+    # A bare KPI x airline array skips the DataFrame transpose and parsing
+    fig_heatmap = px.imshow(
+        kpi_data.to_numpy(dtype=np.float32).T,
+        x=list(kpi_data.index),
+        y=list(kpi_data.columns),
+        labels=dict(x="Airline", y="KPI", color="Score"),
+        title="KPI Performance Heatmap by Airline",
+        color_continuous_scale="RdYlGn"
+    )
+    fig_heatmap.update_layout(height=400)
+    return fig_heatmap
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_resolution_fig(resolution_data):
+    """Build the resolution rate vs total grievances scatter plot"""
+    fig_resolution = build_bubble_fig(
+        resolution_data['Airline'].to_numpy(),
+        resolution_data['Total_Received'].to_numpy(),
+        resolution_data['Resolution_Rate_Percent'].to_numpy(),
+        resolution_data['Total_Closed'].to_numpy(dtype=np.float64, na_value=0)
+    )
+    fig_resolution.update_layout(
+        title="Resolution Rate vs Total Grievances by Airline",
+        xaxis_title="Total Received",
+        yaxis_title="Resolution Rate (%)",
+        legend_title_text="Airline",
+        height=400
+    )
+    return fig_resolution
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_feedback_fig(feedback_resolved, feedback_unresolved):
+    """Build the feedback resolution status donut chart"""
+    fig_feedback = go.Figure(data=[
+        go.Pie(
+            labels=['Issue Resolved', 'Issue Not Resolved'],
+            values=[feedback_resolved, feedback_unresolved],
+            hole=0.4,
+            marker_colors=['#2ca02c', '#d62728']
+        )
+    ])
+    fig_feedback.update_layout(
+        title="Feedback Resolution Status",
+        height=400
+    )
+    return fig_feedback
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_type_fig(type_stats):
+    """Build the grievances by type bar chart"""
+    fig_type = go.Figure(go.Bar(
+        x=type_stats['Type'].to_numpy(),
+        y=type_stats['Total_Received'].to_numpy()
+    ))
+    fig_type.update_xaxes(tickangle=45)
+    fig_type.update_layout(
+        title="Total Grievances by Type",
+        xaxis_title="Type",
+        yaxis_title="Total Grievances",
+        height=400
+    )
+    return fig_type
+
+@st.cache_resource(ttl=DATA_TTL)
+def build_type_kpi_fig(type_kpi):
+    """Build the type resolution rate vs satisfaction scatter plot"""
+    fig_type_kpi = build_bubble_fig(
+        type_kpi['Type'].to_numpy(),
+        type_kpi['Resolution_Rate_Percent'].to_numpy(),
+        type_kpi['Satisfaction_Score'].to_numpy(),
+        type_kpi['Total_Received'].to_numpy(dtype=np.float64, na_value=0)
+    )
+    fig_type_kpi.update_layout(
+        title="Type Performance: Resolution Rate vs Satisfaction",
+        xaxis_title="Resolution Rate (%)",
+        yaxis_title="Satisfaction Score",
+        legend_title_text="Type",
+        height=400
+    )
+    return fig_type_kpi
+
+# Grace period past the cache expiry before rerunning, so the rerun doesn't
+# race the expiry and get served the old entry again
+REFRESH_GRACE = timedelta(seconds=5)
+
+@st.fragment(run_every=60)
+def refresh_countdown(fetched_at):
+    """Show the time until the cached data expires, and rerun the app once it has"""
+    remaining = (fetched_at + DATA_TTL + REFRESH_GRACE - datetime.now()).total_seconds()
+    if remaining <= 0:
+        st.rerun()
+    st.caption(f"⏱️ Data refreshes in about {max(1, round(remaining / 60))} min")
 
 # Dashboard Header
 st.markdown('<h1 class="main-header">✈️ Airlines Grievance Analytics Dashboard</h1>', unsafe_allow_html=True)
@@ -206,7 +715,13 @@ st.markdown('<h1 class="main-header">✈️ Airlines Grievance Analytics Dashboa
 st.sidebar.header("📋 Filters & Settings")
 
 # Date range selector
-min_date, max_date = get_date_range()
+# st.cache_data doesn't cache exceptions, so a failed query is retried on
+# the next rerun instead of being served from the cache
+try:
+    min_date, max_date, airline_companies = get_metadata()
+except Exception as e:
+    st.error(f"Query failed: {str(e)}")
+    st.stop()
 if min_date and max_date:
     col1, col2 = st.sidebar.columns(2)
     with col1:
@@ -230,368 +745,252 @@ else:
     st.stop()
 
 # Airline company filter
-airline_companies = get_airline_companies()
 selected_airlines = st.sidebar.multiselect(
     "Select Airlines",
     options=airline_companies,
     default=airline_companies[:5] if len(airline_companies) > 5 else airline_companies
 )
 
+# Order-independent cache key for the airline selection: the same set of
+# airlines maps to the same cached results and query parameters
+airlines_key = tuple(sorted(selected_airlines))
+
+# A manual refresh drops the cached data for every filter set so the next
+# fetch hits BigQuery; the one-hour metadata cache is left alone
+if st.sidebar.button("🔄 Refresh Data"):
+    build_dashboard_payload.clear()
+    build_csv.clear()
+
 # Auto-refresh toggle
 auto_refresh = st.sidebar.checkbox("Auto-refresh (10 min)", value=True)
 
-# Fetch data
-if st.sidebar.button("🔄 Refresh Data") or auto_refresh:
-    data = get_grievance_data(start_date, end_date, selected_airlines)
-    
-    if not data:
-        st.warning("No data found for the selected criteria")
-        st.stop()
-    
-    # Convert to DataFrame and calculate metrics
-    df = pd.DataFrame(data)
-    df['Date_Inserted'] = pd.to_datetime(df['Date_Inserted'])
-    df = calculate_metrics(df)
-    
-    # Key Metrics Row
-    st.markdown("## 📊 Key Performance Indicators")
-    
-    col1, col2, col3, col4, col5, col6 = st.columns(6)
-    
-    with col1:
-        total_received = df['Total_Received'].sum()
-        st.metric("Total Grievances", f"{total_received:,}")
-    
-    with col2:
-        total_active = df['Total_Active'].sum()
-        st.metric("Active Grievances", f"{total_active:,}")
-    
-    with col3:
-        total_closed = df['Total_Closed'].sum()
-        st.metric("Closed Grievances", f"{total_closed:,}")
-    
-    with col4:
-        avg_resolution_rate = df['Resolution_Rate_Percent'].mean()
-        st.metric("Avg Resolution Rate", f"{avg_resolution_rate:.1f}%")
-    
-    with col5:
-        avg_escalation_rate = df['Escalation_Rate_Percent'].mean()
-        st.metric("Avg Escalation Rate", f"{avg_escalation_rate:.1f}%")
-    
-    with col6:
-        avg_satisfaction = df['Satisfaction_Score'].mean()
-        st.metric("Avg Satisfaction", f"{avg_satisfaction:.1f}/5")
-    
-    # Create visualizations
-    st.markdown("## 📈 Analytics & Insights")
-    
-    # Row 1: Time series and airline by type chart
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("### 📅 Grievances Over Time")
-        daily_stats = df.groupby('Date_Inserted').agg({
-            'Total_Received': 'sum',
-            'Total_Active': 'sum',
-            'Total_Closed': 'sum'
-        }).reset_index()
-        
-        fig_time = go.Figure()
-        fig_time.add_trace(go.Scatter(
-            x=daily_stats['Date_Inserted'],
-            y=daily_stats['Total_Received'],
-            name='Total Received',
-            line=dict(color='#1f77b4', width=3)
-        ))
-        fig_time.add_trace(go.Scatter(
-            x=daily_stats['Date_Inserted'],
-            y=daily_stats['Total_Active'],
-            name='Active',
-            line=dict(color='#ff7f0e', width=2)
-        ))
-        fig_time.add_trace(go.Scatter(
-            x=daily_stats['Date_Inserted'],
-            y=daily_stats['Total_Closed'],
-            name='Closed',
-            line=dict(color='#2ca02c', width=2)
-        ))
-        
-        fig_time.update_layout(
-            xaxis_title="Date",
-            yaxis_title="Number of Grievances",
-            hovermode='x unified',
-            height=400
-        )
-        st.plotly_chart(fig_time, use_container_width=True)
-    
-    with col2:
-        st.markdown("### 🔄 Grievances by Airline & Type")
-        airline_type_stats = df.groupby(['Airline', 'Type'])['Total_Received'].sum().reset_index()
-        airline_type_stats = airline_type_stats.sort_values('Total_Received', ascending=False)
-        
-        fig_airline_type = px.bar(
-            airline_type_stats,
-            x='Airline',
-            y='Total_Received',
-            color='Type',
-            title="Total Grievances by Airline and Type",
-            labels={'Total_Received': 'Total Grievances', 'Airline': 'Airline'}
-        )
-        fig_airline_type.update_xaxes(tickangle=45)
-        fig_airline_type.update_layout(height=400)
-        st.plotly_chart(fig_airline_type, use_container_width=True)
-    
-    # Row 2: Airlines distribution and rating analysis
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("### ✈️ Airlines Distribution")
-        airline_stats = df.groupby('Airline')['Total_Received'].sum().reset_index()
-        airline_stats = airline_stats.sort_values('Total_Received', ascending=False)
-        
-        fig_airline = px.pie(
-            airline_stats,
-            values='Total_Received',
-            names='Airline',
-            title="Total Grievances by Airline"
-        )
-        fig_airline.update_layout(height=400)
-        st.plotly_chart(fig_airline, use_container_width=True)
-    
-    with col2:
-        st.markdown("### ⭐ Rating Distribution")
-        rating_cols = ['Grievances_With_Very_Good_Rating', 'Grievances_With_Good_Rating', 
-                      'Grievances_With_OK_Rating', 'Grievances_With_Bad_Rating', 'Grievances_With_Very_Bad_Rating']
-        rating_sums = [df[col].sum() for col in rating_cols]
-        rating_labels = ['Very Good', 'Good', 'OK', 'Bad', 'Very Bad']
-        
-        fig_ratings = go.Figure(data=[
-            go.Bar(
-                x=rating_labels,
-                y=rating_sums,
-                marker_color=['#2ca02c', '#7fcc7f', '#ffff99', '#ff7f0e', '#d62728']
-            )
-        ])
-        fig_ratings.update_layout(
-            title="Grievance Ratings",
-            xaxis_title="Rating",
-            yaxis_title="Number of Grievances",
-            height=400
-        )
-        st.plotly_chart(fig_ratings, use_container_width=True)
-    
-    # Row 3: Social media and KPI heatmap
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("### 📱 Social Media Grievances")
-        social_data = {
-            'Platform': ['Twitter', 'Facebook'],
-            'Grievances': [df['Twitter_Grievances'].sum(), df['Facebook_Grievances'].sum()]
-        }
-        social_df = pd.DataFrame(social_data)
-        
-        fig_social = px.bar(
-            social_df,
-            x='Platform',
-            y='Grievances',
-            color='Platform',
-            title="Social Media Platform Distribution"
-        )
-        fig_social.update_layout(height=400)
-        st.plotly_chart(fig_social, use_container_width=True)
-    
-    with col2:
-        st.markdown("### 🎯 KPI Heatmap by Airline")
-        # Create heatmap of KPIs by airline
-        kpi_data = df.groupby('Airline').agg({
-            'Resolution_Rate_Percent': 'mean',
-            'Escalation_Rate_Percent': 'mean',
-            'Satisfaction_Score': 'mean',
-            'Feedback_Response_Rate_Percent': 'mean'
-        }).reset_index()
-        
-        if not kpi_data.empty and len(kpi_data) > 0:
-            fig_heatmap = px.imshow(
-                kpi_data.set_index('Airline').T,
-                labels=dict(x="Airline", y="KPI", color="Score"),
-                title="KPI Performance Heatmap by Airline",
-                color_continuous_scale="RdYlGn"
-            )
-            fig_heatmap.update_layout(height=400)
-            st.plotly_chart(fig_heatmap, use_container_width=True)
-        else:
-            st.info("No data available for KPI heatmap")
-    
-    # Row 4: Resolution analysis and feedback analysis
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("### 🔄 Airlines Resolution Analysis")
-        resolution_data = df.groupby('Airline').agg({
-            'Total_Received': 'sum',
-            'Total_Closed': 'sum',
-            'Resolution_Rate_Percent': 'mean'
-        }).reset_index()
-        
-        fig_resolution = px.scatter(
-            resolution_data,
-            x='Total_Received',
-            y='Resolution_Rate_Percent',
-            size='Total_Closed',
-            color='Airline',
-            title="Resolution Rate vs Total Grievances by Airline",
-            labels={'Total_Received': 'Total Received', 'Resolution_Rate_Percent': 'Resolution Rate (%)', 'Airline': 'Airline'}
-        )
-        fig_resolution.update_layout(height=400)
-        st.plotly_chart(fig_resolution, use_container_width=True)
-    
-    with col2:
-        st.markdown("### 💬 Feedback Analysis")
-        feedback_resolved = df['Grievances_With_Feedback_Issue_Resolved'].sum()
-        feedback_unresolved = df['Grievances_With_Feedback_Issue_Not_Resolved'].sum()
-        
-        if feedback_resolved > 0 or feedback_unresolved > 0:
-            fig_feedback = go.Figure(data=[
-                go.Pie(
-                    labels=['Issue Resolved', 'Issue Not Resolved'],
-                    values=[feedback_resolved, feedback_unresolved],
-                    hole=0.4,
-                    marker_colors=['#2ca02c', '#d62728']
-                )
-            ])
-            fig_feedback.update_layout(
-                title="Feedback Resolution Status",
-                height=400
-            )
-            st.plotly_chart(fig_feedback, use_container_width=True)
-        else:
-            st.info("No feedback data available")
-    
-    # New Row: Type Analysis
-    st.markdown("### 📊 Grievance Type Analysis")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("#### Type Distribution")
-        type_stats = df.groupby('Type')['Total_Received'].sum().reset_index()
-        type_stats = type_stats.sort_values('Total_Received', ascending=False)
-        
-        fig_type = px.bar(
-            type_stats,
-            x='Type',
-            y='Total_Received',
-            title="Total Grievances by Type",
-            labels={'Total_Received': 'Total Grievances'}
-        )
-        fig_type.update_xaxes(tickangle=45)
-        fig_type.update_layout(height=400)
-        st.plotly_chart(fig_type, use_container_width=True)
-    
-    with col2:
-        st.markdown("#### Type Performance Metrics")
-        type_kpi = df.groupby('Type').agg({
-            'Total_Received': 'sum',
-            'Resolution_Rate_Percent': 'mean',
-            'Escalation_Rate_Percent': 'mean',
-            'Satisfaction_Score': 'mean'
-        }).reset_index()
-        
-        fig_type_kpi = px.scatter(
-            type_kpi,
-            x='Resolution_Rate_Percent',
-            y='Satisfaction_Score',
-            size='Total_Received',
-            color='Type',
-            title="Type Performance: Resolution Rate vs Satisfaction",
-            labels={'Resolution_Rate_Percent': 'Resolution Rate (%)', 'Satisfaction_Score': 'Satisfaction Score'}
-        )
-        fig_type_kpi.update_layout(height=400)
-        st.plotly_chart(fig_type_kpi, use_container_width=True)
-    
-    # Detailed Data Table
-    st.markdown("## 📋 Detailed Data")
-    
-    # Add filters for the table
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        show_only_active = st.checkbox("Show only active grievances")
-    with col2:
-        min_grievances = st.slider("Minimum grievances", 0, int(df['Total_Received'].max()), 0)
-    with col3:
-        selected_types = st.multiselect("Filter by Type", options=df['Type'].unique())
-    
-    # Filter data for table
-    table_df = df.copy()
-    if show_only_active:
-        table_df = table_df[table_df['Total_Active'] > 0]
-    if min_grievances > 0:
-        table_df = table_df[table_df['Total_Received'] >= min_grievances]
-    if selected_types:
-        table_df = table_df[table_df['Type'].isin(selected_types)]
-    
-    # Select columns for display
-    display_cols = ['Date_Inserted', 'Airline', 'Type', 'Total_Received', 
-                   'Total_Active', 'Total_Closed', 'Resolution_Rate_Percent', 
-                   'Escalation_Rate_Percent', 'Satisfaction_Score']
-    st.dataframe(
-        table_df[display_cols].sort_values('Date_Inserted', ascending=False),
-        use_container_width=True,
-        height=400
+# Fetch data. This runs on every rerun; widget changes that don't touch the
+# filters are served from the cache instead of re-querying BigQuery
+try:
+    payload = build_dashboard_payload(start_date, end_date, airlines_key)
+except Exception as e:
+    st.error(f"Query failed: {str(e)}")
+    st.stop()
+df = payload['df']
+
+# The countdown runs from when the shared cache entry was fetched, which may
+# have been another session's request
+if auto_refresh:
+    with st.sidebar:
+        refresh_countdown(payload['fetched_at'])
+
+if df.empty:
+    st.warning("No data found for the selected criteria")
+    st.stop()
+
+airline_agg = payload['airline_agg']
+column_totals = payload['column_totals']
+rating_sums = payload['rating_sums']
+
+# Key Metrics Row
+st.markdown("## 📊 Key Performance Indicators")
+
+col1, col2, col3, col4, col5, col6 = st.columns(6)
+
+with col1:
+    total_received = df['Total_Received'].sum()
+    st.metric("Total Grievances", f"{total_received:,}")
+
+with col2:
+    total_active = df['Total_Active'].sum()
+    st.metric("Active Grievances", f"{total_active:,}")
+
+with col3:
+    total_closed = df['Total_Closed'].sum()
+    st.metric("Closed Grievances", f"{total_closed:,}")
+
+# Overall rates are taken from the summed counts, weighting every grievance
+# equally rather than averaging the per-row rates
+total_rated = rating_sums.sum()
+
+with col4:
+    avg_resolution_rate = total_closed / total_received * 100 if total_received else 0
+    st.metric("Avg Resolution Rate", f"{avg_resolution_rate:.1f}%")
+
+with col5:
+    avg_escalation_rate = df['Total_Escalated'].sum() / total_received * 100 if total_received else 0
+    st.metric("Avg Escalation Rate", f"{avg_escalation_rate:.1f}%")
+
+with col6:
+    # Ratings run from Very Good (5) down to Very Bad (1)
+    avg_satisfaction = rating_sums @ np.arange(5, 0, -1) / total_rated if total_rated else 0
+    st.metric("Avg Satisfaction", f"{avg_satisfaction:.1f}/5")
+
+# Create visualizations
+st.markdown("## 📈 Analytics & Insights")
+
+# Row 1: Time series and airline by type chart
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("### 📅 Grievances Over Time")
+    st.plotly_chart(build_time_fig(payload['daily_stats']), use_container_width=True)
+
+with col2:
+    st.markdown("### 🔄 Grievances by Airline & Type")
+    st.plotly_chart(build_airline_type_fig(payload['airline_type_stats']), use_container_width=True)
+
+# Row 2: Airlines distribution and rating analysis
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("### ✈️ Airlines Distribution")
+    st.plotly_chart(build_airline_fig(payload['airline_stats']), use_container_width=True)
+
+with col2:
+    st.markdown("### ⭐ Rating Distribution")
+    st.plotly_chart(build_ratings_fig(payload['rating_sums']), use_container_width=True)
+
+# Row 3: Social media and KPI heatmap
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("### 📱 Social Media Grievances")
+    fig_social = build_social_fig(
+        column_totals.get('Twitter_Grievances', 0),
+        column_totals.get('Facebook_Grievances', 0)
     )
+    st.plotly_chart(fig_social, use_container_width=True)
+
+with col2:
+    st.markdown("### 🎯 KPI Heatmap by Airline")
+    # Create heatmap of KPIs by airline
+    kpi_data = payload['kpi_data']
     
-    # Summary statistics
-    st.markdown("## 📊 Summary Statistics")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("### Airlines Performance")
-        airline_summary = df.groupby('Airline').agg({
-            'Total_Received': ['sum', 'mean'],
-            'Resolution_Rate_Percent': 'mean',
-            'Escalation_Rate_Percent': 'mean',
-            'Satisfaction_Score': 'mean'
-        }).round(2)
-        airline_summary.columns = ['Total', 'Daily Avg', 'Avg Resolution %', 'Avg Escalation %', 'Avg Satisfaction']
-        st.dataframe(airline_summary)
-    
-    with col2:
-        st.markdown("### Overall Metrics")
-        overall_stats = {
-            'Metric': ['Total Grievances', 'Average Daily Grievances', 'Peak Daily Grievances', 
-                      'Overall Resolution Rate', 'Overall Escalation Rate', 'Overall Satisfaction',
-                      'Social Media Rate', 'Feedback Response Rate'],
-            'Value': [
-                f"{df['Total_Received'].sum():,}",
-                f"{df['Total_Received'].mean():.1f}",
-                f"{df['Total_Received'].max():,}",
-                f"{df['Resolution_Rate_Percent'].mean():.1f}%",
-                f"{df['Escalation_Rate_Percent'].mean():.1f}%",
-                f"{df['Satisfaction_Score'].mean():.1f}/5",
-                f"{df['Social_Media_Rate_Percent'].mean():.1f}%",
-                f"{df['Feedback_Response_Rate_Percent'].mean():.1f}%"
-            ]
-        }
-        st.dataframe(pd.DataFrame(overall_stats), hide_index=True)
-    
-    # Export functionality
-    st.markdown("## 💾 Export Data")
-    
-    col1, col2, col3 = st.columns(3)
+    if not kpi_data.empty and len(kpi_data) > 0:
+        st.plotly_chart(build_heatmap_fig(kpi_data), use_container_width=True)
+    else:
+        st.info("No data available for KPI heatmap")
+
+# Row 4: Resolution analysis and feedback analysis
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("### 🔄 Airlines Resolution Analysis")
+    st.plotly_chart(build_resolution_fig(payload['resolution_data']), use_container_width=True)
+
+with col2:
+    st.markdown("### 💬 Feedback Analysis")
+    feedback_resolved = column_totals.get('Grievances_With_Feedback_Issue_Resolved', 0)
+    feedback_unresolved = column_totals.get('Grievances_With_Feedback_Issue_Not_Resolved', 0)
     
-    with col1:
-        csv_data = df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv_data,
-            file_name=f"grievance_data_{start_date}_{end_date}.csv",
-            mime="text/csv"
-        )
+    if feedback_resolved > 0 or feedback_unresolved > 0:
+        st.plotly_chart(build_feedback_fig(feedback_resolved, feedback_unresolved), use_container_width=True)
+    else:
+        st.info("No feedback data available")
+
+# New Row: Type Analysis
+st.markdown("### 📊 Grievance Type Analysis")
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("#### Type Distribution")
+    st.plotly_chart(build_type_fig(payload['type_stats']), use_container_width=True)
+
+with col2:
+    st.markdown("#### Type Performance Metrics")
+    st.plotly_chart(build_type_kpi_fig(payload['type_kpi']), use_container_width=True)
+
+# Detailed Data Table
+st.markdown("## 📋 Detailed Data")
+
+# Add filters for the table
+col1, col2, col3 = st.columns(3)
+with col1:
+    show_only_active = st.checkbox("Show only active grievances")
+with col2:
+    min_grievances = st.slider("Minimum grievances", 0, int(df['Total_Received'].max()), 0)
+with col3:
+    selected_types = st.multiselect("Filter by Type", options=df['Type'].unique())
+
+# Select columns for display
+display_cols = ['Date_Inserted', 'Airline', 'Type', 'Total_Received', 
+               'Total_Active', 'Total_Closed', 'Resolution_Rate_Percent', 
+               'Escalation_Rate_Percent', 'Satisfaction_Score']
+
+# Filter data for table with a single combined mask instead of copying df
+mask = np.ones(len(df), dtype=bool)
+if show_only_active:
+    mask &= (df['Total_Active'] > 0).to_numpy(dtype=bool, na_value=False)
+if min_grievances > 0:
+    mask &= (df['Total_Received'] >= min_grievances).to_numpy(dtype=bool, na_value=False)
+if selected_types:
+    # Look the selection up by category code instead of comparing strings;
+    # the extra trailing slot is where the -1 code of missing types lands
+    type_categories = df['Type'].cat.categories
+    wanted_types = np.zeros(len(type_categories) + 1, dtype=bool)
+    wanted_types[type_categories.get_indexer(selected_types)] = True
+    mask &= wanted_types[df['Type'].cat.codes.to_numpy()]
+# df already arrives newest-first from get_grievance_data's ORDER BY and
+# a boolean mask keeps that order, so the table needs no re-sort
+table_df = df.loc[mask, display_cols]
+
+st.dataframe(
+    table_df,
+    use_container_width=True,
+    height=400
+)
+
+# Summary statistics
+st.markdown("## 📊 Summary Statistics")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("### Airlines Performance")
+    st.dataframe(payload['airline_summary'])
+
+with col2:
+    st.markdown("### Overall Metrics")
+    social_media_rate = df['Total_Social_Media'].sum() / total_received * 100 if total_received else 0
+    feedback_response_rate = df['Grievances_With_Feedback'].sum() / total_received * 100 if total_received else 0
+    overall_stats = {
+        'Metric': ['Total Grievances', 'Average Daily Grievances', 'Peak Daily Grievances', 
+                  'Overall Resolution Rate', 'Overall Escalation Rate', 'Overall Satisfaction',
+                  'Social Media Rate', 'Feedback Response Rate'],
+        'Value': [
+            f"{total_received:,}",
+            f"{df['Total_Received'].mean():.1f}",
+            f"{df['Total_Received'].max():,}",
+            f"{avg_resolution_rate:.1f}%",
+            f"{avg_escalation_rate:.1f}%",
+            f"{avg_satisfaction:.1f}/5",
+            f"{social_media_rate:.1f}%",
+            f"{feedback_response_rate:.1f}%"
+        ]
+    }
+    st.dataframe(pd.DataFrame(overall_stats), hide_index=True)
+
+# Export functionality
+st.markdown("## 💾 Export Data")
+
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    csv_data = build_csv(start_date, end_date, airlines_key)
+    st.download_button(
+        label="📥 Download CSV",
+        data=csv_data,
+        file_name=f"grievance_data_{start_date}_{end_date}.csv",
+        mime="text/csv"
+    )
+
+with col2:
+    # Summary report; the insights rank airlines on their averaged KPIs
+    # rather than picking out a single best day
+    if airline_agg.empty:
+        performance_insights = "- No per-airline data for the selected period"
+    else:
+        performance_insights = f"""- Best Resolution Rate: {airline_agg['Resolution_Rate_Percent'].idxmax()} ({airline_agg['Resolution_Rate_Percent'].max():.1f}%)
+- Lowest Escalation Rate: {airline_agg['Escalation_Rate_Percent'].idxmin()} ({airline_agg['Escalation_Rate_Percent'].min():.1f}%)
+- Highest Satisfaction: {airline_agg['Satisfaction_Score'].idxmax()} ({airline_agg['Satisfaction_Score'].max():.1f}/5)"""
     
-    with col2:
-        # Summary report
-        summary_report = f"""
+    summary_report = f"""
 # Airlines Grievance Analytics Report
 ## Period: {start_date} to {end_date}
 
@@ -604,28 +1003,23 @@ if st.sidebar.button("🔄 Refresh Data") or auto_refresh:
 - Average Satisfaction Score: {avg_satisfaction:.1f}/5
 
 ### Top Airlines:
-{airline_stats.head().to_string(index=False)}
+{payload['airline_stats'].head().to_string(index=False)}
 
 ### Performance Insights:
-- Best Resolution Rate: {df.loc[df['Resolution_Rate_Percent'].idxmax(), 'Airline']} ({df['Resolution_Rate_Percent'].max():.1f}%)
-- Lowest Escalation Rate: {df.loc[df['Escalation_Rate_Percent'].idxmin(), 'Airline']} ({df['Escalation_Rate_Percent'].min():.1f}%)
-- Highest Satisfaction: {df.loc[df['Satisfaction_Score'].idxmax(), 'Airline']} ({df['Satisfaction_Score'].max():.1f}/5)
+{performance_insights}
 
 Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        """
-        
-        st.download_button(
-            label="📄 Download Report",
-            data=summary_report,
-            file_name=f"grievance_report_{start_date}_{end_date}.md",
-            mime="text/markdown"
-        )
+    """
     
-    with col3:
-        st.info(f"📊 Data Points: {len(df)}")
+    st.download_button(
+        label="📄 Download Report",
+        data=summary_report,
+        file_name=f"grievance_report_{start_date}_{end_date}.md",
+        mime="text/markdown"
+    )
 
-else:
-    st.info("👈 Please use the sidebar to configure filters and load data")
+with col3:
+    st.info(f"📊 Data Points: {len(df)}")
 
 # Footer
 st.markdown("---")